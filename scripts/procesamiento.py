@@ -1,4 +1,5 @@
 # scripts/procesamiento.py
+import numpy as np
 import pandas as pd
 import sqlite3
 import logging
@@ -16,6 +17,65 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+class DimensionLookup:
+    """Tablas de búsqueda densas para enriquecer ventas sin merge
+
+    Cada dimensión se guarda en arreglos indexados por el ID entero
+    normalizado; la última posición contiene el valor centinela que se
+    usa para IDs desconocidos, nulos o fuera de rango.
+    """
+
+    CIUDAD_DESCONOCIDA = "ciudad_desconocida"
+    CATEGORIA_DESCONOCIDA = "categoria_desconocida"
+
+    def __init__(self, clientes_df, productos_df):
+        self.ciudades = self._build_array(
+            clientes_df, "cliente_id", "ciudad", self.CIUDAD_DESCONOCIDA, object
+        )
+        self.categorias = self._build_array(
+            productos_df, "producto_id", "categoria", self.CATEGORIA_DESCONOCIDA, object
+        )
+        self.precios = self._build_array(
+            productos_df, "producto_id", "precio_unitario", np.nan, np.float64
+        )
+
+    @staticmethod
+    def _build_array(df, key, column, sentinel, dtype):
+        """Construye un arreglo denso valor[id] con el centinela al final"""
+        ids = df[key].to_numpy(dtype=np.int64)
+        size = int(ids.max()) + 1 if len(ids) else 0
+
+        # Posiciones sin dimensión (huecos en los IDs) también son centinela
+        values = np.full(size + 1, sentinel, dtype=dtype)
+        values[ids] = df[column].to_numpy(dtype=dtype)
+        return values
+
+    @staticmethod
+    def _positions(ids, values):
+        """Traduce IDs a posiciones válidas del arreglo de la dimensión"""
+        ids = np.asarray(ids)
+        sentinel = len(values) - 1
+
+        # NaN falla ambas comparaciones y cae en el centinela
+        valid = (ids >= 0) & (ids < sentinel)
+        return np.where(valid, ids, sentinel).astype(np.intp)
+
+    def enrich_clientes(self, chunk):
+        """Agrega la ciudad del cliente al bloque de ventas"""
+        chunk["ciudad"] = self.ciudades[
+            self._positions(chunk["cliente_id"].to_numpy(), self.ciudades)
+        ]
+        return chunk
+
+    def enrich_productos(self, chunk):
+        """Agrega categoría, precio unitario e ingreso al bloque de ventas"""
+        positions = self._positions(chunk["producto_id"].to_numpy(), self.precios)
+        chunk["categoria"] = self.categorias[positions]
+        chunk["precio_unitario"] = self.precios[positions]
+        chunk["ingreso"] = chunk["cantidad"].to_numpy() * chunk["precio_unitario"].to_numpy()
+        return chunk
+
+
 class DataProcessor:
     def __init__(self):
         self.db_path = "database/empresa.db"
@@ -117,24 +177,33 @@ class DataProcessor:
         logger.warning(f"Formato de fecha no reconocido: {date_str}")
         return None
 
-    def enrich_ventas(self, ventas_df, clientes_df):
+    def enrich_ventas(self, ventas_df, lookup):
         """Enriquece ventas con datos de ciudad"""
         logger.info("Enriqueciendo ventas con ciudades...")
 
-        # LEFT JOIN para preservar todas las ventas
-        result = ventas_df.merge(
-            clientes_df[["cliente_id", "ciudad"]], on="cliente_id", how="left"
-        )
-
-        # Rellenar ciudades faltantes
-        result["ciudad"] = result["ciudad"].fillna("ciudad_desconocida")
+        # Búsqueda por índice: preserva todas las ventas sin copiar la tabla
+        result = lookup.enrich_clientes(ventas_df)
 
-        missing_cities = result["ciudad"].eq("ciudad_desconocida").sum()
+        missing_cities = result["ciudad"].eq(lookup.CIUDAD_DESCONOCIDA).sum()
         if missing_cities > 0:
             logger.warning(f"{missing_cities} ventas sin datos de ciudad del cliente")
 
         return result
 
+    def load_ventas_chunked(self, ventas_path, lookup, chunksize=50000):
+        """Limpia, enriquece y carga ventas por bloques"""
+        logger.info(f"Cargando ventas por bloques de {chunksize}...")
+
+        total = 0
+        with sqlite3.connect(self.db_path) as conn:
+            for chunk in pd.read_csv(ventas_path, chunksize=chunksize):
+                chunk = self.enrich_ventas(self.clean_ventas(chunk), lookup)
+                chunk.to_sql("ventas", conn, if_exists="append", index=False)
+                total += len(chunk)
+
+        logger.info(f"{total} ventas cargadas por bloques")
+        return total
+
     def create_schema(self):
         """Crea el esquema de la base de datos"""
         logger.info("Creando esquema de base de datos...")
@@ -228,7 +297,8 @@ class DataProcessor:
             inventario_clean = self.clean_inventario(inventario_df)
 
             # 3. Enriquecer ventas
-            ventas_enriched = self.enrich_ventas(ventas_clean, clientes_clean)
+            lookup = DimensionLookup(clientes_clean, productos_clean)
+            ventas_enriched = self.enrich_ventas(ventas_clean, lookup)
 
             logger.info(
                 f"Datos procesados - Productos: {len(productos_clean)}, Clientes: {len(clientes_clean)}, Ventas: {len(ventas_enriched)}, Inventario: {len(inventario_clean)}"